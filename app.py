@@ -1,11 +1,15 @@
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
 import matplotlib.patches as patches
-from matplotlib.patches import FancyBboxPatch
+from matplotlib.patches import BoxStyle, FancyBboxPatch
+from matplotlib.colors import to_rgba
+from matplotlib.collections import LineCollection, PatchCollection
+from matplotlib.path import Path
 import numpy as np
 from io import BytesIO
-import base64
+from PIL import Image
 
 # Page configuration
 st.set_page_config(
@@ -15,7 +19,7 @@ st.set_page_config(
 )
 
 # Custom CSS for professional styling
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-header {
         font-size: 3rem;
@@ -43,83 +47,135 @@ st.markdown("""
         box-shadow: 0 4px 6px rgba(0, 0, 0, 0.1);
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+
+# Step icons for the professional infographic
+STEP_ICONS = ('📥', '🔍', '📈', '🤝', '⚡', '✅', '🎯')
+
+# Modern color palette for the Canva-style infographic
+CANVA_PALETTE = tuple(to_rgba(c) for c in (
+    '#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8'
+))
+
+# Rounded box style shared by every card, parsed once
+ROUNDED_BOX = BoxStyle("round", pad=0.1)
+
+# Text styles, resolved once instead of per ax.text call
+TITLE_FONT = FontProperties(family='sans-serif', weight='bold', size=24)
+ICON_FONT = FontProperties(size=30)
+STEP_LABEL_FONT = FontProperties(family='sans-serif', weight='bold', size=14)
+STEP_DESC_FONT = FontProperties(family='sans-serif', size=10)
+CANVA_TITLE_FONT = FontProperties(family='sans-serif', weight='bold', size=28)
+CANVA_NUMBER_FONT = FontProperties(family='sans-serif', weight='bold', size=16)
+CANVA_DESC_FONT = FontProperties(family='sans-serif', weight='bold', size=12)
+CANVA_FOOTER_FONT = FontProperties(family='sans-serif', size=14)
+
+# Open chevron arrowhead with its tip at the marker origin, matching '->'
+ARROW_HEAD = Path([(-1, 1), (0, 0), (-1, -1)],
+                  [Path.MOVETO, Path.LINETO, Path.LINETO])
+
+# Preview renders stay light; downloads use publication resolution
+PREVIEW_DPI = 100
+EXPORT_DPI = 300
+
+# Default methodology steps shown in the sidebar
+DEFAULT_STEPS = (
+    "Data Collection & Preparation",
+    "Unit Root Testing (ADF, PP)",
+    "Stationarity Analysis",
+    "Cointegration Testing",
+    "VECM Model Estimation",
+    "Diagnostic Checking",
+    "Results Interpretation"
+)
 
 def create_professional_infographic(methodology_steps, title, colors):
     """Create a professional infographic using matplotlib"""
-    fig, ax = plt.subplots(figsize=(16, 10))
+    fig = Figure(figsize=(16, 10))
+    ax = fig.add_subplot()
+    
+    # Parse the user colors once for every artist that uses them
+    primary = to_rgba(colors['primary'])
+    secondary = to_rgba(colors['secondary'])
     
     # Set background
     fig.patch.set_facecolor('#f8f9fa')
     ax.set_facecolor('#f8f9fa')
     
-    # Remove axes
+    # Remove axes and let them fill the figure
     ax.set_xlim(0, 16)
     ax.set_ylim(0, 10)
     ax.axis('off')
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
     
     # Title
     title_box = FancyBboxPatch((0.5, 9), 15, 0.8, 
-                              boxstyle="round,pad=0.1", 
-                              facecolor=colors['primary'], 
+                              boxstyle=ROUNDED_BOX, 
+                              facecolor=primary, 
                               edgecolor='white', linewidth=3)
     ax.add_patch(title_box)
     ax.text(8, 9.4, title, ha='center', va='center', 
-            fontsize=24, weight='bold', color='white',
-            fontfamily='sans-serif')
+            fontproperties=TITLE_FONT, color='white')
     
-    # Methodology steps
-    icons = ['📥', '🔍', '📈', '🤝', '⚡', '✅', '🎯']
+    # Methodology steps on a grid, four per row
+    idx = np.arange(len(methodology_steps))
+    xs = 2 + (idx % 4) * 3.5
+    ys = 7 - (idx // 4) * 2.8
     
-    for i, step in enumerate(methodology_steps):
-        x_pos = 2 + (i % 4) * 3.5
-        y_pos = 7 - (i // 4) * 2.8
-        
+    step_boxes = []
+    for i, (step, x_pos, y_pos) in enumerate(zip(methodology_steps, xs, ys)):
         # Create step box
-        step_box = FancyBboxPatch((x_pos, y_pos), 3, 2.2,
-                                boxstyle="round,pad=0.1",
-                                facecolor=colors['secondary'],
-                                edgecolor='white', linewidth=2)
-        ax.add_patch(step_box)
+        step_boxes.append(FancyBboxPatch((x_pos, y_pos), 3, 2.2,
+                                         boxstyle=ROUNDED_BOX,
+                                         facecolor=secondary,
+                                         edgecolor='white', linewidth=2))
         
         # Icon
-        ax.text(x_pos + 1.5, y_pos + 1.7, icons[i % len(icons)], 
-                ha='center', va='center', fontsize=30)
+        ax.text(x_pos + 1.5, y_pos + 1.7, STEP_ICONS[i % len(STEP_ICONS)], 
+                ha='center', va='center', fontproperties=ICON_FONT)
         
         # Step text
         ax.text(x_pos + 1.5, y_pos + 1.2, f"Step {i+1}", 
-                ha='center', va='center', fontsize=14, 
-                weight='bold', color='white')
+                ha='center', va='center', 
+                fontproperties=STEP_LABEL_FONT, color='white')
         
         # Description
         ax.text(x_pos + 1.5, y_pos + 0.7, step, 
-                ha='center', va='center', fontsize=10, 
-                color='white', wrap=True)
+                ha='center', va='center', 
+                fontproperties=STEP_DESC_FONT, color='white', wrap=True)
     
-    # Add connecting arrows
-    for i in range(len(methodology_steps) - 1):
-        if (i + 1) % 4 != 0:  # Don't draw arrows between rows
-            x1 = 2 + (i % 4) * 3.5 + 3
-            x2 = 2 + ((i + 1) % 4) * 3.5
-            y = 7 - (i // 4) * 2.8 + 1.1
-            ax.annotate('', xy=(x2, y), xytext=(x1, y),
-                       arrowprops=dict(arrowstyle='->', 
-                                     color=colors['primary'], 
-                                     lw=2))
+    # Add all step boxes as a single collection
+    ax.add_collection(PatchCollection(step_boxes, match_original=True))
+    
+    # Add connecting arrows as one line collection with chevron heads
+    linked = (idx[:-1] + 1) % 4 != 0  # Don't draw arrows between rows
+    arrow_y = ys[:-1][linked] + 1.1
+    arrow_segments = np.stack([
+        np.column_stack([xs[:-1][linked] + 3, arrow_y]),
+        np.column_stack([xs[1:][linked], arrow_y])
+    ], axis=1)
+    
+    if len(arrow_segments):
+        ax.add_collection(LineCollection(arrow_segments,
+                                         colors=primary,
+                                         linewidths=2))
+        heads = arrow_segments[:, 1]
+        ax.scatter(heads[:, 0], heads[:, 1], marker=ARROW_HEAD, s=60,
+                   facecolors='none', edgecolors=primary, linewidths=2,
+                   zorder=3)
     
-    plt.tight_layout()
     return fig
 
 def create_canva_style_infographic(research_data):
     """Create Canva-style modern infographic"""
-    fig, ax = plt.subplots(figsize=(18, 12))
-    
-    # Modern color palette
-    colors = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7', '#DDA0DD', '#98D8C8']
+    fig = Figure(figsize=(18, 12))
+    ax = fig.add_subplot()
     
     ax.set_xlim(0, 18)
     ax.set_ylim(0, 12)
     ax.axis('off')
+    fig.subplots_adjust(left=0, right=1, bottom=0, top=1)
     
     # Main title with gradient effect
     title_bg = patches.Rectangle((1, 10), 16, 1.2, 
@@ -129,39 +185,38 @@ def create_canva_style_infographic(research_data):
     ax.add_patch(title_bg)
     ax.text(9, 10.6, "RESEARCH METHODOLOGY INFOGRAPHIC", 
             ha='center', va='center', 
-            fontsize=28, weight='bold', color='white',
-            fontfamily='sans-serif')
+            fontproperties=CANVA_TITLE_FONT, color='white')
     
     # Steps in modern layout
     steps = research_data['steps']
-    for i, step in enumerate(steps):
-        row = i // 3
-        col = i % 3
-        
-        x = 2 + col * 5
-        y = 8 - row * 3
-        
+    idx = np.arange(len(steps))
+    xs = 2 + (idx % 3) * 5
+    ys = 8 - (idx // 3) * 3
+    
+    cards = []
+    for i, (step, x, y) in enumerate(zip(steps, xs, ys)):
         # Modern card design
-        card = FancyBboxPatch((x, y), 4.5, 2.2,
-                            boxstyle="round,pad=0.1",
-                            facecolor=colors[i % len(colors)],
-                            edgecolor='white',
-                            linewidth=3,
-                            alpha=0.9)
-        ax.add_patch(card)
+        cards.append(FancyBboxPatch((x, y), 4.5, 2.2,
+                                    boxstyle=ROUNDED_BOX,
+                                    facecolor=CANVA_PALETTE[i % len(CANVA_PALETTE)],
+                                    edgecolor='white',
+                                    linewidth=3,
+                                    alpha=0.9))
         
         # Step number
         ax.text(x + 0.5, y + 1.7, f"{i+1:02d}", 
                 ha='left', va='center', 
-                fontsize=16, weight='bold', 
+                fontproperties=CANVA_NUMBER_FONT, 
                 color='white', alpha=0.8)
         
         # Step description
         ax.text(x + 2.25, y + 1.1, step, 
                 ha='center', va='center', 
-                fontsize=12, weight='bold', 
-                color='white', wrap=True,
-                fontfamily='sans-serif')
+                fontproperties=CANVA_DESC_FONT, 
+                color='white', wrap=True)
+    
+    # Add all cards as a single collection
+    ax.add_collection(PatchCollection(cards, match_original=True))
     
     # Footer
     footer_bg = patches.Rectangle((1, 0.5), 16, 0.8,
@@ -171,45 +226,56 @@ def create_canva_style_infographic(research_data):
     ax.add_patch(footer_bg)
     ax.text(9, 0.9, research_data['conclusion'],
             ha='center', va='center',
-            fontsize=14, color='white',
-            fontfamily='sans-serif')
+            fontproperties=CANVA_FOOTER_FONT, color='white')
     
-    plt.tight_layout()
     return fig
 
-def get_image_download_link(fig, filename, text):
-    """Generate a download link for the image"""
+def figure_to_png(fig, dpi):
+    """Rasterize a figure to PNG bytes"""
+    fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+    
+    # Encode the Agg buffer directly with a fast deflate level
     buf = BytesIO()
-    fig.savefig(buf, format='png', dpi=300, bbox_inches='tight')
-    buf.seek(0)
-    b64 = base64.b64encode(buf.read()).decode()
-    href = f'<a href="data:image/png;base64,{b64}" download="{filename}">{text}</a>'
-    return href
+    Image.fromarray(rgba).save(buf, format='PNG', dpi=(dpi, dpi),
+                               compress_level=1)
+    return buf.getvalue()
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_professional_infographic(methodology_steps, title, primary, secondary, dpi):
+    """Render the professional infographic to PNG bytes, cached on its inputs"""
+    fig = create_professional_infographic(
+        methodology_steps, title,
+        {'primary': primary, 'secondary': secondary}
+    )
+    return figure_to_png(fig, dpi)
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def render_canva_style_infographic(steps, conclusion, dpi):
+    """Render the Canva-style infographic to PNG bytes, cached on its inputs"""
+    fig = create_canva_style_infographic({
+        'steps': steps,
+        'conclusion': conclusion
+    })
+    return figure_to_png(fig, dpi)
 
 # Streamlit App Interface
 def main():
     st.markdown('<div class="main-header">🎓 Academic Infographic Generator</div>', 
                 unsafe_allow_html=True)
     
-    # Sidebar for input
-    with st.sidebar:
+    # Sidebar for input, batched in a form so edits only rerun on submit
+    with st.sidebar.form("research_form"):
         st.header("Research Details")
         research_title = st.text_input("Research Title", 
                                      "Financial Time Series Analysis")
         
         st.subheader("Methodology Steps")
         steps = []
-        for i in range(7):
-            step = st.text_input(f"Step {i+1}", 
-                               value=[
-                                   "Data Collection & Preparation",
-                                   "Unit Root Testing (ADF, PP)",
-                                   "Stationarity Analysis",
-                                   "Cointegration Testing",
-                                   "VECM Model Estimation",
-                                   "Diagnostic Checking",
-                                   "Results Interpretation"
-                               ][i] if i < 7 else "")
+        for i, default_step in enumerate(DEFAULT_STEPS):
+            step = st.text_input(f"Step {i+1}", value=default_step)
             if step:
                 steps.append(step)
         
@@ -218,66 +284,55 @@ def main():
         
         conclusion = st.text_area("Conclusion Text", 
                                 "Advanced Econometric Analysis Revealing Significant Relationships")
+        
+        st.form_submit_button("🎨 Generate Infographic")
     
     # Main content area
     col1, col2 = st.columns([1, 1])
     
     with col1:
         st.subheader("📋 Your Research Methodology")
-        research_data = {
-            'title': research_title,
-            'steps': steps,
-            'colors': {
-                'primary': color_primary,
-                'secondary': color_secondary
-            },
-            'conclusion': conclusion
-        }
-        
-        # Display methodology as list
-        for i, step in enumerate(steps, 1):
-            st.markdown(f"""
-            <div class="step-box">
-                <b>Step {i}:</b> {step}
-            </div>
-            """, unsafe_allow_html=True)
+        # Display methodology as list in a single markdown element
+        st.markdown("\n".join(
+            f'<div class="step-box"><b>Step {i}:</b> {step}</div>'
+            for i, step in enumerate(steps, 1)
+        ), unsafe_allow_html=True)
     
     with col2:
         st.subheader("🎨 Generated Infographic")
         
         # Generate infographic
         if steps:
-            # Professional style
-            fig1 = create_professional_infographic(
-                steps, 
-                research_title,
-                research_data['colors']
-            )
+            # Only the selected style is rendered
+            style = st.radio("Infographic Style", ["Professional", "Canva"],
+                             horizontal=True)
             
-            # Canva style
-            fig2 = create_canva_style_infographic({
-                'steps': steps,
-                'conclusion': conclusion
-            })
+            if style == "Professional":
+                render = render_professional_infographic
+                render_args = (tuple(steps), research_title,
+                               color_primary, color_secondary)
+                file_name = "professional_infographic.png"
+            else:
+                render = render_canva_style_infographic
+                render_args = (tuple(steps), conclusion)
+                file_name = "canva_style_infographic.png"
             
-            # Display images
-            st.pyplot(fig1)
-            st.markdown("---")
-            st.pyplot(fig2)
+            # Display image
+            st.image(render(*render_args, PREVIEW_DPI), use_column_width=True)
             
-            # Download buttons
-            col_d1, col_d2 = st.columns(2)
-            with col_d1:
-                st.markdown(get_image_download_link(
-                    fig1, "professional_infographic.png", 
-                    "📥 Download Professional Style"
-                ), unsafe_allow_html=True)
+            # High-resolution exports are only rendered once requested
+            # for the current inputs
+            export_key = (style,) + render_args
+            if st.button("🖨️ Prepare High-Resolution Download"):
+                st.session_state.export_key = export_key
             
-            with col_d2:
-                st.markdown(get_image_download_link(
-                    fig2, "canva_style_infographic.png", 
-                    "📥 Download Canva Style"
-                ), unsafe_allow_html=True)
+            if st.session_state.get('export_key') == export_key:
+                st.download_button(
+                    f"📥 Download {style} Style",
+                    data=render(*render_args, EXPORT_DPI),
+                    file_name=file_name,
+                    mime="image/png"
+                )
     
     # Additional features
     st.markdown("---")